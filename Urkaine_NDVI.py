@@ -39,8 +39,15 @@ Ukraine = get_country_geometry("Ukraine")
 
 list_year = [2018, 2019, 2020, 2021, 2022, 2023, 2024]
 
-ndvi_2018 = get_masked_NDVI("COPERNICUS/S2_HARMONIZED", Ukraine, combinedMask, list_year[0], ["B8", "B4"])
-ndvi_2024 = get_masked_NDVI("COPERNICUS/S2_HARMONIZED", Ukraine, combinedMask, list_year[-1], ["B8", "B4"])
+# Season window instead of the full year, clouds masked per scene
+season = ((6, 1), (9, 30))
+
+ndvi_2018 = get_masked_S2_NDVI(Ukraine, combinedMask, list_year[0], season)
+ndvi_2024 = get_masked_S2_NDVI(Ukraine, combinedMask, list_year[-1], season)
+
+# old version: median over all bands of the whole year
+# ndvi_2018 = get_masked_NDVI("COPERNICUS/S2_HARMONIZED", Ukraine, combinedMask, list_year[0], ["B8", "B4"])
+# ndvi_2024 = get_masked_NDVI("COPERNICUS/S2_HARMONIZED", Ukraine, combinedMask, list_year[-1], ["B8", "B4"])
 # Calculate Difference between start and end
 ndviChange = ndvi_2024.subtract(ndvi_2018).rename('NDVI_Change')
 
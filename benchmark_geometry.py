@@ -0,0 +1,68 @@
+import time
+
+import ee
+from shapely.geometry import shape, box
+
+from utils import get_country_geometry, SIMPLIFY_FACTOR, METERS_PER_DEGREE
+
+# Vergleicht Vertex-Anzahl und Clip-Zeit der vollen Ländergrenze mit der
+# vereinfachten Geometrie aus prepare_geometry (lokal mit shapely)
+
+ee.Initialize(project='impressive-bay-447915-g8')
+
+countries = ["Germany", "Ukraine"]
+scales = [200, 250]
+
+# grid of tiles the polygon is clipped against, roughly one export tile each
+GRID = 20
+REPEAT = 3
+
+
+def count_vertices(geom):
+    polygons = geom.geoms if hasattr(geom, 'geoms') else [geom]
+    return sum(
+        len(p.exterior.coords) + sum(len(r.coords) for r in p.interiors)
+        for p in polygons
+    )
+
+
+def clip_time(geom, tiles):
+    best = float('inf')
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        for tile in tiles:
+            geom.intersection(tile)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def tile_grid(bounds):
+    minx, miny, maxx, maxy = bounds
+    dx = (maxx - minx) / GRID
+    dy = (maxy - miny) / GRID
+    return [
+        box(minx + i * dx, miny + j * dy, minx + (i + 1) * dx, miny + (j + 1) * dy)
+        for i in range(GRID)
+        for j in range(GRID)
+    ]
+
+
+for name in countries:
+    exact = shape(get_country_geometry(name).getInfo())
+    tiles = tile_grid(exact.bounds)
+    t_exact = clip_time(exact, tiles)
+    print(f"{name}: exact      {count_vertices(exact):>8} vertices, clip {t_exact * 1000:8.1f} ms")
+
+    for scale in scales:
+        tolerance = scale * SIMPLIFY_FACTOR / METERS_PER_DEGREE
+        simplified = exact.simplify(tolerance, preserve_topology=True)
+        t_simple = clip_time(simplified, tiles)
+        print(
+            f"{name}: scale {scale:>4} m {count_vertices(simplified):>8} vertices, "
+            f"clip {t_simple * 1000:8.1f} ms ({t_exact / t_simple:.1f}x)"
+        )
+
+    # filterBounds only needs the bounding box
+    bbox = box(*exact.bounds)
+    t_bbox = clip_time(bbox, tiles)
+    print(f"{name}: bbox       {count_vertices(bbox):>8} vertices, clip {t_bbox * 1000:8.1f} ms")
@@ -0,0 +1,193 @@
+import ee
+import ee.batch
+import numpy as np
+
+# Inkrementelle NDVI-Change-Detection: pro Pixel laufende Statistiken
+# (count, mean, M2 nach Welford, Summen für die lineare Regression).
+# Ein neues Jahr aktualisiert nur die Statistik, frühere Jahre werden nicht neu gelesen.
+# Zwei Backends mit denselben Bändern: lokal (NumPy) und serverseitig (ee.Image).
+
+# Years are stored relative to this to keep the regression sums small
+T_REF = 2000
+
+STATS_BANDS = ['count', 'mean', 'm2', 'sum_t', 'sum_tt', 'sum_ty', 'first', 'last', 'previous']
+
+
+class NDVIChangeStats:
+    """
+    Laufende Statistik für NumPy-Arrays (e.g. aus RasterStore.read / memmap).
+    """
+
+    def __init__(self, shape: tuple):
+        self.years = []
+        self.count = np.zeros(shape, dtype='uint16')
+        for band in STATS_BANDS[1:]:
+            # regression sums cancel in trend(), float32 is not precise enough there
+            dtype = 'float64' if band.startswith('sum_') else 'float32'
+            setattr(self, band, np.zeros(shape, dtype=dtype))
+
+    @classmethod
+    def load(cls, path: str) -> 'NDVIChangeStats':
+        with np.load(path) as data:
+            stats = cls(data['count'].shape)
+            stats.years = [int(y) for y in data['years']]
+            for band in STATS_BANDS:
+                setattr(stats, band, data[band])
+        return stats
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            years=np.array(self.years, dtype='int32'),
+            **{band: getattr(self, band) for band in STATS_BANDS}
+        )
+
+    def update(self, year: int, ndvi):
+        """
+        Fügt ein Jahr hinzu, O(Pixel). NaN bzw. maskierte Pixel zählen nicht.
+
+        Args:
+            year (int): Jahr, muss nach dem letzten hinzugefügten liegen
+            ndvi (np.ndarray): 2D NDVI-Werte in der Form der Statistik
+        """
+        if self.years and year <= self.years[-1]:
+            raise ValueError(f"Jahr {year} liegt nicht nach {self.years[-1]}.")
+
+        x = np.ma.filled(np.ma.asarray(ndvi, dtype='float32'), np.nan)
+        if x.shape != self.count.shape:
+            raise ValueError(f"Form {x.shape} passt nicht zu {self.count.shape}.")
+        valid = np.isfinite(x)
+        x = np.where(valid, x, 0).astype('float32')
+        t = year - T_REF
+
+        # first/previous/last
+        self.first = np.where(valid & (self.count == 0), x, self.first)
+        self.previous = np.where(valid, self.last, self.previous)
+        self.last = np.where(valid, x, self.last)
+
+        # Welford: mean und M2
+        self.count += valid
+        delta = np.where(valid, x - self.mean, 0)
+        self.mean += delta / np.maximum(self.count, 1)
+        self.m2 += delta * np.where(valid, x - self.mean, 0)
+
+        # Summen für die Steigung
+        self.sum_t += valid * t
+        self.sum_tt += valid * t * t
+        self.sum_ty += valid * t * x
+
+        self.years.append(year)
+
+    def delta(self) -> np.ndarray:
+        """Letztes minus erstes gültiges Jahr pro Pixel (wie ndvi2024.subtract(ndvi2018))."""
+        return np.where(self.count >= 2, self.last - self.first, np.nan)
+
+    def year_delta(self) -> np.ndarray:
+        """Letztes minus vorletztes gültiges Jahr pro Pixel."""
+        return np.where(self.count >= 2, self.last - self.previous, np.nan)
+
+    def std(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count >= 2, np.sqrt(self.m2 / (self.count - 1.0)), np.nan)
+
+    def zscore(self) -> np.ndarray:
+        """Abweichung des letzten Jahres vom Mittel aller Jahre in Standardabweichungen."""
+        std = self.std()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(std > 0, (self.last - self.mean) / std, np.nan)
+
+    def trend(self) -> np.ndarray:
+        """Steigung der linearen Regression in NDVI pro Jahr."""
+        n = self.count.astype('float64')
+        sum_y = self.mean * n
+        denom = n * self.sum_tt - self.sum_t ** 2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(denom > 0, (n * self.sum_ty - self.sum_t * sum_y) / denom, np.nan)
+
+
+def ee_init_stats() -> ee.Image:
+    """Leere Statistik als ee.Image mit STATS_BANDS."""
+    return ee.Image.constant([0] * len(STATS_BANDS)).toDouble().rename(STATS_BANDS)
+
+
+def ee_update_stats(stats: ee.Image, ndvi: ee.Image, year: int) -> ee.Image:
+    """
+    Serverseitiges Update mit einem NDVI-Bild, gleiche Rechnung wie NDVIChangeStats.update.
+
+    Args:
+        stats (ee.Image): ee_init_stats() oder das exportierte Stats-Asset
+        ndvi (ee.Image): einbandiges NDVI des neuen Jahres, e.g. get_masked_MODIS_NDVI
+        year (int): Jahr des NDVI-Bildes
+
+    Returns:
+        ee.Image: aktualisierte Statistik
+    """
+    # metadata only; adding a year twice would double-count count, sum_* and m2
+    last_year = stats.get('last_year').getInfo()
+    if last_year is not None and year <= last_year:
+        raise ValueError(f"Jahr {year} liegt nicht nach {last_year}.")
+
+    valid = ndvi.mask().gt(0)
+    x = ndvi.unmask(0).toFloat()
+    t = year - T_REF
+
+    count = stats.select('count')
+    mean = stats.select('mean')
+    m2 = stats.select('m2')
+    last = stats.select('last')
+
+    count_new = count.add(valid)
+    delta = x.subtract(mean)
+    mean_new = mean.where(valid, mean.add(delta.divide(count_new.max(1))))
+    m2_new = m2.where(valid, m2.add(delta.multiply(x.subtract(mean_new))))
+
+    return ee.Image.cat([
+        count_new,
+        mean_new,
+        m2_new,
+        stats.select('sum_t').add(valid.multiply(t)),
+        stats.select('sum_tt').add(valid.multiply(t * t)),
+        stats.select('sum_ty').add(valid.multiply(x).multiply(t)),
+        stats.select('first').where(valid.And(count.eq(0)), x),
+        last.where(valid, x),
+        stats.select('previous').where(valid, last),
+    ]).toDouble().rename(STATS_BANDS).set('last_year', year)
+
+
+def ee_delta(stats: ee.Image) -> ee.Image:
+    return stats.select('last').subtract(stats.select('first')) \
+        .updateMask(stats.select('count').gte(2)) \
+        .rename('NDVI_Change')
+
+
+def ee_zscore(stats: ee.Image) -> ee.Image:
+    count = stats.select('count')
+    std = stats.select('m2').divide(count.subtract(1)).sqrt()
+    return stats.select('last').subtract(stats.select('mean')).divide(std) \
+        .updateMask(count.gte(2).And(std.gt(0))) \
+        .rename('NDVI_zscore')
+
+
+def ee_trend(stats: ee.Image) -> ee.Image:
+    n = stats.select('count')
+    sum_t = stats.select('sum_t')
+    sum_y = stats.select('mean').multiply(n)
+    denom = n.multiply(stats.select('sum_tt')).subtract(sum_t.pow(2))
+    return n.multiply(stats.select('sum_ty')).subtract(sum_t.multiply(sum_y)).divide(denom) \
+        .updateMask(denom.gt(0)) \
+        .rename('NDVI_trend')
+
+
+def export_change_stats(stats, out_folder, region, year, scale=250):
+    """Exportiert die Statistik als Asset, das nächste Jahr baut darauf auf."""
+    task = ee.batch.Export.image.toAsset(
+        image=stats,
+        description=f"NDVI_Change_Stats_{str(year)}",
+        assetId=f"{out_folder}/NDVI_Change_Stats_{str(year)}",
+        region=region,
+        scale=scale,
+        crs='EPSG:4326',
+        maxPixels=1e13
+        )
+    task.start()
+    return task
@@ -0,0 +1,92 @@
+import numpy as np
+from PIL import Image, ImageColor
+
+# Lokales Rendering im Stil der GEE vis_params (min/max/palette).
+# Karte und PDF-Legende nutzen dieselbe LUT.
+
+LUT_SIZE = 256
+
+
+def parse_color(color: str) -> tuple:
+    """
+    RGB aus einem GEE-Palettenwert: CSS-Name ('green') oder Hex mit/ohne '#'.
+    """
+    if len(color) in (3, 6) and all(ch in '0123456789abcdefABCDEF' for ch in color):
+        color = '#' + color
+    return ImageColor.getrgb(color)[:3]
+
+
+def build_lut(palette: list, size: int = LUT_SIZE) -> np.ndarray:
+    """
+    Interpoliert die Palette linear auf size Einträge, wie getThumbURL.
+
+    Args:
+        palette (list): Farben, gleichmäßig zwischen min und max verteilt
+        size (int, optional): Anzahl LUT-Einträge. Defaults to LUT_SIZE.
+
+    Returns:
+        np.ndarray: uint8 Array (size, 3)
+    """
+    stops = np.array([parse_color(c) for c in palette], dtype='float64')
+    if len(stops) == 1:
+        return np.repeat(stops, size, axis=0).astype('uint8')
+    positions = np.linspace(0, 1, len(stops))
+    samples = np.linspace(0, 1, size)
+    lut = np.stack([np.interp(samples, positions, stops[:, ch]) for ch in range(3)], axis=1)
+    return np.round(lut).astype('uint8')
+
+
+def apply_vis(array, vis_params: dict, lut: np.ndarray = None) -> np.ndarray:
+    """
+    Streckt ein Array auf min/max und färbt es über die LUT ein.
+
+    Args:
+        array (np.ndarray): 2D Werte, NaN oder maskierte Pixel werden transparent
+        vis_params (dict): {'min', 'max', 'palette'} wie für getThumbURL
+        lut (np.ndarray, optional): vorberechnete LUT, sonst aus der Palette. Defaults to None.
+
+    Returns:
+        np.ndarray: uint8 RGBA Array (H, W, 4)
+    """
+    if lut is None:
+        lut = build_lut(vis_params['palette'])
+    v_min, v_max = vis_params['min'], vis_params['max']
+
+    data = np.ma.filled(np.ma.asarray(array, dtype='float32'), np.nan)
+    valid = np.isfinite(data)
+
+    # 1) Strecken auf LUT-Indizes, außerhalb von min/max wird geclippt
+    if v_max == v_min:
+        # degenerate stretch: every valid pixel gets the first palette colour
+        index = np.zeros(data.shape, dtype='uint8')
+    else:
+        scaled = (np.where(valid, data, v_min) - v_min) * ((len(lut) - 1) / (v_max - v_min))
+        index = np.clip(scaled, 0, len(lut) - 1).astype('uint8' if len(lut) <= 256 else 'int32')
+
+    # 2) Farbe per Lookup, Alpha aus der Maske
+    rgba = np.empty(data.shape + (4,), dtype='uint8')
+    rgba[..., :3] = lut[index]
+    rgba[..., 3] = np.where(valid, 255, 0)
+    return rgba
+
+
+def render_png(array, path: str, vis_params: dict, lut: np.ndarray = None):
+    """Schreibt ein eingefärbtes Array als PNG (transparent außerhalb der Maske)."""
+    Image.fromarray(apply_vis(array, vis_params, lut), mode='RGBA').save(path)
+
+
+def draw_legend(c, lut: np.ndarray, x: float, y: float, width: float, height: float,
+                min_val: float, max_val: float, text_offset: float = 5):
+    """
+    Zeichnet die LUT als vertikale Farbleiste auf einen reportlab Canvas.
+    """
+    step = height / len(lut)
+    for i, (r, g, b) in enumerate(lut):
+        c.setFillColorRGB(r / 255, g / 255, b / 255)
+        c.rect(x, y + i * step, width, step, fill=1, stroke=0)
+
+    # Min/Max-Beschriftung
+    c.setFont("Helvetica", 9)
+    c.setFillColorRGB(0, 0, 0)
+    c.drawString(x + width + text_offset, y, f"{min_val:.2f}")
+    c.drawString(x + width + text_offset, y + height - 9, f"{max_val:.2f}")
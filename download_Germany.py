@@ -0,0 +1,28 @@
+import re
+
+import ee
+from utils import filter_bounds_geojson, img_collection, MODIS_NDVI_YEAR_PATTERN
+from raster_store import RasterStore, bbox_from_geojson
+
+ee.Initialize(project='impressive-bay-447915-g8')
+
+# Lädt die exportierten Assets einmal herunter, danach wird lokal gearbeitet
+
+img_collection_germany = img_collection('projects/impressive-bay-447915-g8/assets/weekly_lsts_forest_agri/')
+
+bbox = bbox_from_geojson(filter_bounds_geojson('Germany'))
+
+with RasterStore() as store:
+    for img in img_collection_germany:
+        info = img.getInfo()
+        asset_id = info['id']
+        # only the annual assets get a year, e.g. the 2018–2024 change image stays NULL
+        year = re.search(MODIS_NDVI_YEAR_PATTERN, asset_id)
+        for band in [b['id'] for b in info['bands']]:
+            print(f"Downloading {asset_id} / {band} ...")
+            entry = store.download(
+                asset_id, band, bbox,
+                scale=250,
+                year=int(year.group(1)) if year else None,
+            )
+            print(f"  -> {entry['path']} ({entry['checksum'][:12]})")
@@ -17,5 +17,6 @@ images_to_pdf(
         image_folder="Images",
         output_pdf="German_NDVI_Report.pdf",
         descriptions=text,
-        common_prefix='German_NDVI_'
+        common_prefix='German_NDVI_',
+        vis_params={'min': 0, 'max': 1.0, 'palette': ['white', 'yellow', 'green']}
     )
\ No newline at end of file
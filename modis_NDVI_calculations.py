@@ -57,3 +57,12 @@ export_masked_MODIS_NDVI(ndviChange, 'projects/impressive-bay-447915-g8/assets/w
 # for year in list_year:
 #     processMODIS_NDVI(year, country_geom, combinedMask, 'projects/impressive-bay-447915-g8/assets/weekly_lsts_forest_agri')
 #     print(f"Uploading Image {year} ...")
+
+# incremental change detection: only the new year is read, the stats asset holds all earlier years
+# from change_detection import ee_init_stats, ee_update_stats, ee_delta, ee_trend, ee_zscore, export_change_stats
+# stats = ee_init_stats()  # or ee.Image(f'{out_folder}/NDVI_Change_Stats_{previous_year}')
+# for year in list_year:
+#     ndvi = get_masked_MODIS_NDVI(year, Germany, combinedMask, "MODIS/061/MOD13Q1")
+#     stats = ee_update_stats(stats, ndvi, year)
+# export_change_stats(stats, 'projects/impressive-bay-447915-g8/assets/weekly_lsts_forest_agri', Germany, list_year[-1])
+# ndviTrend = ee_trend(stats)
@@ -0,0 +1,220 @@
+import asyncio
+import glob
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+import aiohttp
+
+from utils import filter_bounds_geojson, images_to_pdf
+from raster_store import bbox_from_geojson
+
+# Asynchrone Pipeline über mehrere Länder: EE-Berechnung (Thread),
+# Download (aiohttp) und PDF/Bilder (Prozess) laufen überlappend.
+# Die Queues zwischen den Stufen sind begrenzt, d.h. eine langsame Stufe
+# bremst die vorherige (Backpressure) statt Ergebnisse anzuhäufen.
+
+# Countries waiting between two stages
+QUEUE_SIZE = 1
+
+# Parallel HTTP downloads
+MAX_DOWNLOADS = 4
+
+# Seconds between status checks of an EE export task
+POLL_INTERVAL = 30
+
+DOWNLOAD_TIMEOUT = 300
+
+
+@dataclass
+class CountryJob:
+    """
+    Ein Land in der Pipeline.
+
+    compute: blockierend (EE), läuft im Thread, gibt [(url, dateiname), ...] zurück;
+             startet ggf. Exporte und wartet mit wait_for_task darauf
+    render: läuft im Prozess-Pool und muss picklebar sein (Top-Level-Funktion / partial),
+            bekommt die Liste der heruntergeladenen Pfade
+    """
+    country: str
+    compute: Callable
+    render: Callable
+    image_folder: str = 'Images'
+
+
+def wait_for_task(task, poll: float = POLL_INTERVAL):
+    """
+    Wartet blockierend auf einen ee.batch Task (für den Thread-Executor).
+    """
+    while True:
+        status = task.status()
+        state = status['state']
+        if state == 'COMPLETED':
+            return status
+        if state in ('FAILED', 'CANCELLED'):
+            raise RuntimeError(f"Task {status.get('description')} {state}: {status.get('error_message')}")
+        time.sleep(poll)
+
+
+def thumbnail_requests(images, country: str, prefix: str, vis_params: dict,
+                       scale: float = 290, crs: str = 'EPSG:3035', width: int = 800) -> list:
+    """
+    Thumbnail-URLs wie in extract_Germany.py, für CountryJob.compute.
+
+    Returns:
+        list: [(url, dateiname), ...]
+    """
+    bounds_geojson = filter_bounds_geojson(country)
+    minx, miny, maxx, maxy = bbox_from_geojson(bounds_geojson)
+    height = round(width * ((maxy - miny) / (maxx - minx)))
+
+    thumb_params = {
+        'region': bounds_geojson,
+        'scale': scale,
+        'crs': crs,
+        'width': width,
+        'height': height,
+        'format': 'png',
+        'transparent': True,
+        **vis_params
+    }
+
+    thumbs = []
+    for img in images:
+        asset_id = img.get('system:id').getInfo().split('/')[-1]
+        thumbs.append((img.getThumbURL(thumb_params), f'{prefix}{asset_id}.png'))
+    return thumbs
+
+
+def render_report(paths: list, output_pdf: str, title: str, common_prefix: str, vis_params: dict = None) -> str:
+    """
+    PDF aus den heruntergeladenen PNGs, für CountryJob.render.
+    Beschreibung pro Seite: '<title> <Jahr>', Jahr aus dem Dateinamen.
+    """
+    image_folder = os.path.dirname(paths[0]) if paths else 'Images'
+
+    # images_to_pdf takes every PNG with the prefix, not just this run's downloads
+    descriptions = {}
+    for path in glob.glob(os.path.join(image_folder, f"{common_prefix}*.png")):
+        basename = os.path.splitext(os.path.basename(path))[0]
+        year = re.search(r'(\d{4})', basename)
+        descriptions[basename] = f"{title} {year.group(1)}" if year else title
+
+    images_to_pdf(
+        image_folder=image_folder,
+        output_pdf=output_pdf,
+        descriptions=descriptions,
+        common_prefix=common_prefix,
+        vis_params=vis_params
+    )
+    return output_pdf
+
+
+async def download(session, url: str, path: str, semaphore: asyncio.Semaphore) -> str:
+    async with semaphore:
+        async with session.get(url) as r:
+            r.raise_for_status()
+            data = await r.read()
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def job_failed(job: CountryJob, exc: Exception, results: dict):
+    # one broken country must not stop the others; its result is the exception
+    results[job.country] = exc
+    print(f"{job.country} fehlgeschlagen: {exc!r}")
+
+
+async def compute_stage(jobs, out_queue: asyncio.Queue, thread_pool, results: dict):
+    loop = asyncio.get_running_loop()
+    for job in jobs:
+        try:
+            urls = await loop.run_in_executor(thread_pool, job.compute)
+        except Exception as exc:
+            job_failed(job, exc, results)
+            continue
+        # blocks while the download stage is still busy
+        await out_queue.put((job, urls))
+    await out_queue.put(None)
+
+
+async def download_stage(in_queue: asyncio.Queue, out_queue: asyncio.Queue, session, semaphore, results: dict):
+    while (item := await in_queue.get()) is not None:
+        job, urls = item
+        try:
+            os.makedirs(job.image_folder, exist_ok=True)
+            paths = await asyncio.gather(*(
+                download(session, url, os.path.join(job.image_folder, name), semaphore)
+                for url, name in urls
+            ))
+        except Exception as exc:
+            job_failed(job, exc, results)
+            continue
+        await out_queue.put((job, list(paths)))
+    await out_queue.put(None)
+
+
+async def render_stage(in_queue: asyncio.Queue, process_pool, results: dict):
+    loop = asyncio.get_running_loop()
+    while (item := await in_queue.get()) is not None:
+        job, paths = item
+        try:
+            results[job.country] = await loop.run_in_executor(process_pool, job.render, paths)
+        except Exception as exc:
+            job_failed(job, exc, results)
+            continue
+        print(f"{job.country} fertig: {results[job.country]}")
+
+
+async def run_pipeline(jobs, queue_size: int = QUEUE_SIZE, max_downloads: int = MAX_DOWNLOADS,
+                       threads: int = 1, processes: int = 1) -> dict:
+    """
+    Führt alle Jobs überlappend aus: während Land N gerendert wird,
+    lädt Land N+1 herunter und Land N+2 rechnet auf EE.
+
+    Args:
+        jobs (list): CountryJob pro Land
+        queue_size (int, optional): Länder zwischen zwei Stufen. Defaults to QUEUE_SIZE.
+        max_downloads (int, optional): parallele HTTP-Downloads. Defaults to MAX_DOWNLOADS.
+        threads (int, optional): Threads für blockierende EE-Aufrufe. Defaults to 1.
+        processes (int, optional): Prozesse für PDF/Bilder. Defaults to 1.
+
+    Returns:
+        dict: {country: Ergebnis von render}, bei einem Fehler in compute, Download
+              oder render die Exception dieses Landes (die anderen laufen weiter)
+    """
+    results = {}
+    to_download = asyncio.Queue(maxsize=queue_size)
+    to_render = asyncio.Queue(maxsize=queue_size)
+    semaphore = asyncio.Semaphore(max_downloads)
+    timeout = aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT)
+
+    # no `with` here: its shutdown(wait=True) would block the event loop
+    # until a running EE call returns when a stage fails
+    thread_pool = ThreadPoolExecutor(threads)
+    process_pool = ProcessPoolExecutor(processes)
+    failed = True
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            tasks = [
+                asyncio.create_task(compute_stage(jobs, to_download, thread_pool, results)),
+                asyncio.create_task(download_stage(to_download, to_render, session, semaphore, results)),
+                asyncio.create_task(render_stage(to_render, process_pool, results)),
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # errors of a single job are caught in the stages; anything else
+                # (e.g. cancellation) would leave the others waiting on their queues
+                for task in tasks:
+                    task.cancel()
+                raise
+        failed = False
+    finally:
+        thread_pool.shutdown(wait=not failed, cancel_futures=failed)
+        process_pool.shutdown(wait=not failed, cancel_futures=failed)
+    return results
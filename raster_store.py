@@ -0,0 +1,297 @@
+import hashlib
+import io
+import os
+import sqlite3
+
+import ee
+import numpy as np
+import rasterio
+import requests
+from rasterio.enums import Resampling
+from rasterio.shutil import copy as rio_copy
+from rasterio.transform import from_origin
+from rasterio.windows import Window, from_bounds
+
+from utils import METERS_PER_DEGREE
+
+# Lokaler Speicher für exportierte GEE-Assets als Cloud-Optimized GeoTIFF
+# mit SQLite-Katalog. Danach laufen Thumbnails, Statistiken und PDFs lokal.
+
+DEFAULT_ROOT = 'raster_store'
+CATALOG_NAME = 'catalog.sqlite'
+
+# Tile size for downloads and for the internal COG blocks
+TILE_SIZE = 512
+
+NODATA = -9999.0
+
+# Overviews are only built down to roughly this many pixels
+MIN_OVERVIEW_SIZE = 256
+OVERVIEW_FACTORS = (2, 4, 8, 16, 32, 64)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rasters (
+    asset_id TEXT NOT NULL,
+    band     TEXT NOT NULL,
+    year     INTEGER,
+    path     TEXT NOT NULL,
+    minx     REAL NOT NULL,
+    miny     REAL NOT NULL,
+    maxx     REAL NOT NULL,
+    maxy     REAL NOT NULL,
+    crs      TEXT NOT NULL,
+    scale    REAL NOT NULL,
+    checksum TEXT NOT NULL,
+    PRIMARY KEY (asset_id, band)
+)
+"""
+
+COLUMNS = ('asset_id', 'band', 'year', 'path', 'minx', 'miny', 'maxx', 'maxy', 'crs', 'scale', 'checksum')
+
+
+def bbox_from_geojson(geojson: dict) -> tuple:
+    """
+    Bounding Box (minx, miny, maxx, maxy) aus einem GeoJSON-Polygon, e.g. filter_bounds_geojson.
+    """
+    xs = [p[0] for p in geojson['coordinates'][0]]
+    ys = [p[1] for p in geojson['coordinates'][0]]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def pixel_size(scale: float, crs: str) -> float:
+    """Pixelgröße in Einheiten des CRS für eine Auflösung in Metern."""
+    if crs == 'EPSG:4326':
+        return scale / METERS_PER_DEGREE
+    return scale
+
+
+def tile_windows(width: int, height: int, tile_size: int = TILE_SIZE):
+    """Zerlegt ein Raster in Fenster von höchstens tile_size x tile_size Pixeln."""
+    for row in range(0, height, tile_size):
+        for col in range(0, width, tile_size):
+            yield Window(col, row, min(tile_size, width - col), min(tile_size, height - row))
+
+
+def download_tile(image, band: str, crs: str, transform, window: Window) -> np.ndarray:
+    """
+    Lädt ein Fenster als NPY über getDownloadURL.
+
+    Args:
+        image (ee.Image): Bild mit dem Band, maskierte Pixel bereits mit NODATA gefüllt
+        band (String): Bandname
+        crs (String): Ziel-CRS
+        transform (Affine): Transform des gesamten Rasters
+        window (Window): Ausschnitt, der geladen wird
+
+    Returns:
+        np.ndarray: float32 Array der Größe window.height x window.width
+    """
+    tile_transform = rasterio.windows.transform(window, transform)
+    url = image.getDownloadURL({
+        'bands': [band],
+        'crs': crs,
+        'crs_transform': list(tile_transform)[:6],
+        'dimensions': f"{window.width}x{window.height}",
+        'format': 'NPY',
+    })
+    r = requests.get(url, timeout=300)
+    r.raise_for_status()
+    data = np.load(io.BytesIO(r.content))
+    # NPY downloads are structured arrays with one field per band
+    if data.dtype.names:
+        data = data[band]
+    return data.astype('float32')
+
+
+def file_checksum(path: str) -> str:
+    """SHA-256 einer Datei, blockweise gelesen."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RasterStore:
+    """
+    COG-Dateien plus SQLite-Katalog (asset id, band, year, bbox, CRS, scale, checksum).
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, CATALOG_NAME))
+        self.db.execute(SCHEMA)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def path_for(self, asset_id: str, band: str) -> str:
+        name = asset_id.split('/assets/')[-1].strip('/').replace('/', '__')
+        return os.path.join(self.root, f"{name}__{band}.tif")
+
+    def download(self, asset_id: str, band: str, bbox: tuple, scale: float,
+                 crs: str = 'EPSG:4326', year: int = None, image=None,
+                 tile_size: int = TILE_SIZE) -> dict:
+        """
+        Lädt ein Asset-Band kachelweise herunter und schreibt es als COG mit Overviews.
+
+        Args:
+            asset_id (String): GEE Asset ID
+            band (String): Bandname
+            bbox (tuple): (minx, miny, maxx, maxy) im Ziel-CRS
+            scale (float): Auflösung in Metern
+            crs (String, optional): Ziel-CRS. Defaults to 'EPSG:4326'.
+            year (int, optional): Jahr für den Katalog. Defaults to None.
+            image (ee.Image, optional): statt ee.Image(asset_id), e.g. ein berechnetes Bild. Defaults to None.
+            tile_size (int, optional): Kachelgröße in Pixeln. Defaults to TILE_SIZE.
+
+        Returns:
+            dict: Katalogeintrag
+        """
+        if image is None:
+            image = ee.Image(asset_id).select(band).unmask(NODATA).toFloat()
+
+        minx, miny, maxx, maxy = bbox
+        res = pixel_size(scale, crs)
+        width = max(1, int(np.ceil((maxx - minx) / res)))
+        height = max(1, int(np.ceil((maxy - miny) / res)))
+        transform = from_origin(minx, maxy, res, res)
+
+        path = self.path_for(asset_id, band)
+        tmp_path = path + '.tmp.tif'
+        profile = {
+            'driver': 'GTiff',
+            'dtype': 'float32',
+            'count': 1,
+            'width': width,
+            'height': height,
+            'crs': crs,
+            'transform': transform,
+            'nodata': NODATA,
+            'tiled': True,
+            'blockxsize': tile_size,
+            'blockysize': tile_size,
+        }
+
+        try:
+            # 1) Kacheln direkt in ein temporäres GeoTIFF schreiben (nie das ganze Raster im Speicher)
+            with rasterio.open(tmp_path, 'w', **profile) as dst:
+                for window in tile_windows(width, height, tile_size):
+                    dst.write(download_tile(image, band, crs, transform, window), 1, window=window)
+
+            # 2) Overviews, damit Thumbnails nur wenige Pixel lesen
+            factors = [f for f in OVERVIEW_FACTORS if max(width, height) // f >= MIN_OVERVIEW_SIZE]
+            if factors:
+                with rasterio.open(tmp_path, 'r+') as dst:
+                    dst.build_overviews(factors, Resampling.average)
+                    dst.update_tags(ns='rio_overview', resampling='average')
+
+            # 3) Als COG kopieren (Overviews vor den Daten, komprimiert)
+            rio_copy(
+                tmp_path, path,
+                driver='GTiff',
+                copy_src_overviews=True,
+                tiled=True,
+                blockxsize=tile_size,
+                blockysize=tile_size,
+                compress='deflate',
+                predictor=3,
+            )
+        finally:
+            # a failed tile or copy must not leave the temporary file behind
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        # a stale memmap cache would no longer match the new file
+        if os.path.exists(path + '.npy'):
+            os.remove(path + '.npy')
+
+        entry = {
+            'asset_id': asset_id,
+            'band': band,
+            'year': year,
+            'path': path,
+            'minx': minx,
+            'miny': maxy - height * res,
+            'maxx': minx + width * res,
+            'maxy': maxy,
+            'crs': crs,
+            'scale': scale,
+            'checksum': file_checksum(path),
+        }
+        self.db.execute(
+            f"INSERT OR REPLACE INTO rasters ({', '.join(COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+            [entry[c] for c in COLUMNS],
+        )
+        self.db.commit()
+        return entry
+
+    def entry(self, asset_id: str, band: str) -> dict:
+        row = self.db.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM rasters WHERE asset_id = ? AND band = ?",
+            (asset_id, band),
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"'{asset_id}' / '{band}' nicht im Katalog.")
+        return dict(zip(COLUMNS, row))
+
+    def entries(self, year: int = None, band: str = None) -> list:
+        """Alle Katalogeinträge, optional gefiltert nach Jahr und Band."""
+        query = f"SELECT {', '.join(COLUMNS)} FROM rasters WHERE 1 = 1"
+        params = []
+        if year is not None:
+            query += " AND year = ?"
+            params.append(year)
+        if band is not None:
+            query += " AND band = ?"
+            params.append(band)
+        query += " ORDER BY year, asset_id"
+        return [dict(zip(COLUMNS, row)) for row in self.db.execute(query, params)]
+
+    def read(self, asset_id: str, band: str, bbox: tuple = None, out_shape: tuple = None) -> np.ma.MaskedArray:
+        """
+        Fensterweises Lesen, NODATA ist maskiert.
+
+        Args:
+            bbox (tuple, optional): (minx, miny, maxx, maxy), sonst das ganze Raster. Defaults to None.
+            out_shape (tuple, optional): (height, width), liest dann aus den Overviews. Defaults to None.
+        """
+        with rasterio.open(self.entry(asset_id, band)['path']) as src:
+            window = from_bounds(*bbox, transform=src.transform) if bbox else None
+            return src.read(1, window=window, out_shape=out_shape, masked=True,
+                            resampling=Resampling.average)
+
+    def memmap(self, asset_id: str, band: str) -> np.ndarray:
+        """
+        Gibt das Band als schreibgeschütztes np.memmap zurück (NODATA → NaN).
+        Der unkomprimierte .npy-Cache wird beim ersten Aufruf kachelweise angelegt.
+        """
+        path = self.entry(asset_id, band)['path']
+        cache = path + '.npy'
+        if not os.path.exists(cache):
+            with rasterio.open(path) as src:
+                out = np.lib.format.open_memmap(cache + '.tmp', mode='w+', dtype='float32',
+                                                shape=(src.height, src.width))
+                for _, window in src.block_windows(1):
+                    block = src.read(1, window=window)
+                    block[block == NODATA] = np.nan
+                    out[window.row_off:window.row_off + window.height,
+                        window.col_off:window.col_off + window.width] = block
+                out.flush()
+                del out
+            os.replace(cache + '.tmp', cache)
+        return np.load(cache, mmap_mode='r')
+
+    def verify(self, asset_id: str, band: str) -> bool:
+        """Vergleicht die Checksumme der Datei mit dem Katalog."""
+        entry = self.entry(asset_id, band)
+        return file_checksum(entry['path']) == entry['checksum']
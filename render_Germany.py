@@ -0,0 +1,42 @@
+import re
+
+from utils import MODIS_NDVI_YEAR_PATTERN
+from raster_store import RasterStore
+from colormap import build_lut, render_png
+
+# Lokale Alternative zu extract_Germany.py: rendert die Bilder aus dem
+# RasterStore (download_Germany.py) ohne getThumbURL-Roundtrip.
+# Hinweis: das Raster liegt in EPSG:4326, nicht EPSG:3035 wie die Thumbnails.
+
+W = 800
+
+min_temp = 0
+max_temp = 1.0
+
+# 4. Palette definieren (Hex-Codes von kalt → warm)
+palette = [
+    'white',
+    'yellow',
+    'green'
+]
+
+vis_params = {
+    'min': min_temp,
+    'max': max_temp,
+    'palette': palette
+}
+
+# LUT einmal berechnen, gilt für die ganze Serie
+lut = build_lut(palette)
+
+with RasterStore() as store:
+    for entry in store.entries():
+        # only the annual NDVI rasters, like extract_Germany.py (no change images)
+        if not re.search(MODIS_NDVI_YEAR_PATTERN, entry['asset_id']):
+            continue
+        H = round(W * (entry['maxy'] - entry['miny']) / (entry['maxx'] - entry['minx']))
+        # out_shape reads from the overviews instead of the full raster
+        ndvi = store.read(entry['asset_id'], entry['band'], out_shape=(H, W))
+        asset_name = entry['asset_id'].split('/')[-1]
+        render_png(ndvi, f'Images/German_NDVI_{asset_name}.png', vis_params, lut)
+        print(f"Rendered {asset_name}")
@@ -0,0 +1,102 @@
+import asyncio
+import re
+from functools import partial
+
+import ee
+from utils import (get_country_geometry, getIMG, select_mask_OR, processMODIS_NDVI,
+                   get_masked_S2_NDVI, export_masked_COPERNICUS_NDVI, get_img_from_projects,
+                   MODIS_NDVI_YEAR_PATTERN)
+from orchestrator import CountryJob, run_pipeline, thumbnail_requests, render_report, wait_for_task
+
+# Export, Thumbnails und PDF-Reports für mehrere Länder, überlappend statt nacheinander
+# (ersetzt modis_NDVI_calculations.py → extract_Germany.py → extract_PDF_from_Images.py von Hand).
+# Während ein Land gerendert wird, läuft der Export des nächsten Landes auf EE.
+
+# True: export the assets again first. An export fails if its asset already
+# exists, so delete the old assets beforehand; False uses the existing ones.
+EXPORT = False
+
+list_year = [2018, 2019, 2020, 2021, 2022, 2023, 2024]
+
+GERMANY_FOLDER = 'projects/impressive-bay-447915-g8/assets/weekly_lsts_forest_agri'
+UKRAINE_FOLDER = 'projects/impressive-bay-447915-g8/assets/NDVI_COPERNICUS'
+
+#Copernicus Variables
+LEAVED_FOREST = 311 #Forest and semi natural areas > Forests > Broad-leaved forest
+CONIFEROUS_FOREST = 312 # Forest and semi natural areas > Forests > Coniferous forest
+MIXED_FOREST = 313 #Forest and semi natural areas > Forests > Mixed forest
+
+germany_vis = {
+    'min': 0,
+    'max': 1.0,
+    'palette': ['white', 'yellow', 'green']
+}
+
+ukraine_vis = {
+    'min': -0.3,
+    'max': 0.3,
+    'palette': ['red', 'white', 'green']
+}
+
+
+def germany_compute():
+    if EXPORT:
+        # Wald + Agrar aus CORINE, wie in modis_NDVI_calculations.py
+        corine_EU = getIMG("COPERNICUS/CORINE/V20/100m/2018", "landcover")
+        forestMask = select_mask_OR(corine_EU, LEAVED_FOREST, CONIFEROUS_FOREST, MIXED_FOREST)
+        agriMask = corine_EU.gte(200).And(corine_EU.lt(300))
+        combinedMask = forestMask.Or(agriMask)
+
+        Germany = get_country_geometry("Germany")
+        tasks = [processMODIS_NDVI(year, Germany, combinedMask, GERMANY_FOLDER) for year in list_year]
+        for task in tasks:
+            wait_for_task(task)
+
+    # only the annual assets, not the change images in the same folder
+    assets = ee.data.listAssets({'parent': GERMANY_FOLDER})['assets']
+    images = [ee.Image(a['id']) for a in assets if re.search(MODIS_NDVI_YEAR_PATTERN, a['id'])]
+    return thumbnail_requests(images, 'Germany', 'German_NDVI_', germany_vis)
+
+
+def ukraine_compute():
+    if EXPORT:
+        # Wald + Agrar aus CGLS, wie in Urkaine_NDVI.py
+        cgls = ee.ImageCollection("COPERNICUS/Landcover/100m/Proba-V-C3/Global").first() \
+            .select("discrete_classification")
+        combinedMask = cgls.eq(40).Or(cgls.eq(50)).Or(cgls.eq(30))
+
+        Ukraine = get_country_geometry("Ukraine")
+        season = ((6, 1), (9, 30))
+        ndvi_start = get_masked_S2_NDVI(Ukraine, combinedMask, list_year[0], season)
+        ndvi_end = get_masked_S2_NDVI(Ukraine, combinedMask, list_year[-1], season)
+        ndviChange = ndvi_end.subtract(ndvi_start).rename('NDVI_Change')
+        wait_for_task(export_masked_COPERNICUS_NDVI(ndviChange, UKRAINE_FOLDER, Ukraine, list_year[0], list_year[-1]))
+
+    images = [get_img_from_projects(
+        f'NDVI_COPERNICUS/COPERNICUS_NDVI_Sep_{list_year[0]}_{list_year[-1]}_VEGITAION_Ukraine'
+    )]
+    return thumbnail_requests(images, 'Ukraine', 'Ukraine_NDVI_', ukraine_vis, scale=200)
+
+
+# render runs in a separate process, so only top-level functions / partials
+jobs = [
+    CountryJob(
+        'Germany',
+        compute=germany_compute,
+        render=partial(render_report, output_pdf='German_NDVI_Report.pdf',
+                       title='Germany September', common_prefix='German_NDVI_',
+                       vis_params=germany_vis),
+    ),
+    CountryJob(
+        'Ukraine',
+        compute=ukraine_compute,
+        render=partial(render_report, output_pdf='Ukraine_NDVI_Report.pdf',
+                       title=f'Ukraine NDVI Change {list_year[0]}-{list_year[-1]}', common_prefix='Ukraine_NDVI_',
+                       vis_params=ukraine_vis),
+    ),
+]
+
+if __name__ == '__main__':
+    ee.Initialize(project='impressive-bay-447915-g8')
+    results = asyncio.run(run_pipeline(jobs))
+    print(results)
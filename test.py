@@ -29,31 +29,12 @@ country_geom = get_country_geometry("Germany")
 
 # export_to_drive(final_result, country_geom)
 
-# def calculate_coverage_stats(image, geometry):
-#     """Berechnet Statistiken über die Datenabdeckung"""
-#     # Pixel mit gültigen Daten zählen
-#     valid_pixels = image.select(0).mask().reduceRegion(
-#         reducer=ee.Reducer.sum(),
-#         geometry=geometry,
-#         scale=1000,  # Gröbere Auflösung für Statistik
-#         maxPixels=1e10
-#     )
-
-#     # Gesamte Pixel zählen
-#     total_pixels = ee.Image(1).reduceRegion(
-#         reducer=ee.Reducer.sum(),
-#         geometry=geometry,
-#         scale=1000,
-#         maxPixels=1e10
-#     )
-
-#     return valid_pixels, total_pixels
-
-# # Statistiken berechnen (optional)
-# valid_stats, total_stats = calculate_coverage_stats(final_result, country_geom)
+# Datenabdeckung aus den source/obs_count-Bändern, eine einzige Reduktion
+# quality = summarize_composite_quality(final_result, country_geom) # Landsat only: count_bands=['obs_count_landsat']
 # print("Datenabdeckungs-Statistiken:")
-
-# print("Gesamt Pixel:", total_stats.getInfo())
+# print("Gültige Pixel:", quality['valid_pixels'], "von", quality['total_pixels'])
+# print("Anteil pro Quelle:", quality['source_fraction'])
+# print("Mittlere Beobachtungen pro Pixel und Quelle:", quality['mean_obs_count'])
 
 # print(ee.String("GEE-Verbindung OK").getInfo())
 
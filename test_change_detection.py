@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from change_detection import NDVIChangeStats, ee_update_stats
+
+# Laufende Statistik gegen die direkte Berechnung über alle Jahre.
+
+YEARS = [2018, 2019, 2020, 2021, 2022, 2023, 2024]
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(42)
+    data = rng.uniform(-0.2, 0.9, size=(len(YEARS), 5, 6)).astype('float32')
+    # gaps: a pixel missing in single years and one with only a single valid year
+    data[2, 0, 0] = np.nan
+    data[5, 0, 0] = np.nan
+    data[0, 1, 1] = np.nan
+    data[-1, 1, 1] = np.nan
+    data[1:, 4, 5] = np.nan
+    return data
+
+
+def build(data, years=YEARS):
+    stats = NDVIChangeStats(data.shape[1:])
+    for year, ndvi in zip(years, data):
+        stats.update(year, ndvi)
+    return stats
+
+
+def test_mean_and_std(series):
+    stats = build(series)
+    np.testing.assert_allclose(stats.mean, np.nanmean(series, axis=0), rtol=1e-5)
+    expected_std = np.sqrt(np.nanvar(series, axis=0, ddof=1))
+    np.testing.assert_allclose(stats.std()[:4], expected_std[:4], rtol=1e-4)
+    # one valid year: no spread
+    assert np.isnan(stats.std()[4, 5])
+
+
+def test_trend_with_gaps(series):
+    trend = build(series).trend()
+    for row, col in [(0, 0), (1, 1), (3, 2)]:
+        values = series[:, row, col]
+        valid = np.isfinite(values)
+        expected = np.polyfit(np.array(YEARS)[valid], values[valid], 1)[0]
+        assert trend[row, col] == pytest.approx(expected, rel=1e-4, abs=1e-6)
+    assert np.isnan(trend[4, 5])
+
+
+def test_delta_and_year_delta(series):
+    stats = build(series)
+    assert stats.delta()[2, 3] == pytest.approx(series[-1, 2, 3] - series[0, 2, 3])
+    assert stats.year_delta()[2, 3] == pytest.approx(series[-1, 2, 3] - series[-2, 2, 3])
+    # first and last valid year instead of the missing ones
+    assert stats.delta()[1, 1] == pytest.approx(series[-2, 1, 1] - series[1, 1, 1])
+    assert stats.year_delta()[1, 1] == pytest.approx(series[-2, 1, 1] - series[-3, 1, 1])
+    assert np.isnan(stats.delta()[4, 5])
+
+
+def test_zscore(series):
+    stats = build(series)
+    expected = (series[-1] - np.nanmean(series, axis=0)) / np.sqrt(np.nanvar(series, axis=0, ddof=1))
+    np.testing.assert_allclose(stats.zscore()[2:4], expected[2:4], rtol=1e-4)
+
+
+def test_save_load_then_update(series, tmp_path):
+    path = str(tmp_path / 'stats.npz')
+    build(series[:-1], YEARS[:-1]).save(path)
+
+    stats = NDVIChangeStats.load(path)
+    assert stats.years == YEARS[:-1]
+    stats.update(YEARS[-1], series[-1])
+
+    full = build(series)
+    for band in ['count', 'mean', 'm2', 'sum_t', 'sum_tt', 'sum_ty', 'first', 'last', 'previous']:
+        np.testing.assert_allclose(getattr(stats, band), getattr(full, band), rtol=1e-6)
+    np.testing.assert_allclose(stats.trend(), full.trend(), rtol=1e-6)
+
+
+@pytest.mark.parametrize('year', [2019, 2018])
+def test_non_increasing_year(series, year):
+    stats = build(series[:2], YEARS[:2])
+    with pytest.raises(ValueError):
+        stats.update(year, series[2])
+
+
+def test_shape_mismatch(series):
+    stats = NDVIChangeStats((2, 2))
+    with pytest.raises(ValueError):
+        stats.update(2018, series[0])
+
+
+class FakeValue:
+    def __init__(self, value):
+        self.value = value
+
+    def getInfo(self):
+        return self.value
+
+
+class FakeStats:
+    """Nur die Metadaten eines Stats-Assets, der Check kommt vor jeder Bildberechnung."""
+
+    def __init__(self, last_year):
+        self.last_year = last_year
+
+    def get(self, name):
+        return FakeValue(self.last_year if name == 'last_year' else None)
+
+
+@pytest.mark.parametrize('year', [2023, 2022])
+def test_ee_update_rejects_non_increasing_year(year):
+    with pytest.raises(ValueError):
+        ee_update_stats(FakeStats(2023), None, year)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from colormap import LUT_SIZE, apply_vis, build_lut, parse_color
+
+VIS = {'min': -0.3, 'max': 0.3, 'palette': ['red', 'white', 'green']}
+
+
+def test_lut_endpoints():
+    lut = build_lut(VIS['palette'])
+    assert lut.shape == (LUT_SIZE, 3)
+    assert lut.dtype == np.uint8
+    assert tuple(lut[0]) == (255, 0, 0)
+    assert tuple(lut[-1]) == (0, 128, 0)
+    # middle of the palette is (close to) white
+    assert np.all(lut[LUT_SIZE // 2] >= 254)
+
+
+@pytest.mark.parametrize('color, expected', [
+    ('FF8000', (255, 128, 0)),
+    ('#FF8000', (255, 128, 0)),
+    ('ff8000', (255, 128, 0)),
+    ('f80', (255, 136, 0)),
+    ('#f80', (255, 136, 0)),
+])
+def test_parse_hex_with_and_without_hash(color, expected):
+    assert parse_color(color) == expected
+
+
+def test_hex_palette_matches_named():
+    np.testing.assert_array_equal(build_lut(['FF0000', '#FFFFFF', '008000']), build_lut(VIS['palette']))
+
+
+def test_nan_and_masked_pixels_are_transparent():
+    data = np.ma.array([[0.0, np.nan, 0.1]], mask=[[False, False, True]])
+    rgba = apply_vis(data, VIS)
+    assert list(rgba[0, :, 3]) == [255, 0, 0]
+
+
+def test_values_outside_range_are_clipped():
+    lut = build_lut(VIS['palette'])
+    rgba = apply_vis(np.array([[-5.0, -0.3, 0.3, 5.0]]), VIS, lut)
+    np.testing.assert_array_equal(rgba[0, 0, :3], lut[0])
+    np.testing.assert_array_equal(rgba[0, 1, :3], lut[0])
+    np.testing.assert_array_equal(rgba[0, 2, :3], lut[-1])
+    np.testing.assert_array_equal(rgba[0, 3, :3], lut[-1])
+
+
+def test_degenerate_stretch():
+    vis = {'min': 1, 'max': 1, 'palette': ['red', 'green']}
+    rgba = apply_vis(np.array([[0.0, 1.0, 2.0, np.nan]]), vis)
+    np.testing.assert_array_equal(rgba[0, :3, :3], [[255, 0, 0]] * 3)
+    assert list(rgba[0, :, 3]) == [255, 255, 255, 0]
@@ -0,0 +1,140 @@
+import asyncio
+import http.server
+import threading
+from functools import partial
+
+import aiohttp
+import pytest
+
+import orchestrator
+from orchestrator import CountryJob, run_pipeline, wait_for_task
+
+# Pipeline end-to-end mit Fake-EE (compute ohne Server) und lokalem HTTP-Stub.
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/fail'):
+            self.send_response(500)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(self.path.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server():
+    srv = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{srv.server_address[1]}'
+    srv.shutdown()
+
+
+class FakeTask:
+    """ee.batch Task, der nach ein paar Abfragen fertig ist."""
+
+    def __init__(self, states):
+        self.states = list(states)
+
+    def status(self):
+        state = self.states.pop(0) if len(self.states) > 1 else self.states[0]
+        return {'state': state, 'description': 'fake', 'error_message': 'boom'}
+
+
+def fake_compute(base_url, country, started):
+    # export, then thumbnails, like run_pipeline.py
+    started.append(country)
+    wait_for_task(FakeTask(['READY', 'RUNNING', 'COMPLETED']), poll=0)
+    return [(f'{base_url}/{country}/{i}', f'{country}_{i}.png') for i in range(3)]
+
+
+def read_all(paths):
+    # runs in the process pool, must be a top-level function
+    return sorted(open(p).read() for p in paths)
+
+
+def test_wait_for_task():
+    assert wait_for_task(FakeTask(['RUNNING', 'COMPLETED']), poll=0)['state'] == 'COMPLETED'
+    with pytest.raises(RuntimeError):
+        wait_for_task(FakeTask(['RUNNING', 'FAILED']), poll=0)
+
+
+def test_run_pipeline(server, tmp_path):
+    started = []
+    jobs = [
+        CountryJob(c, partial(fake_compute, server, c, started), read_all, str(tmp_path / c))
+        for c in ['A', 'B', 'C']
+    ]
+    results = asyncio.run(run_pipeline(jobs))
+    assert started == ['A', 'B', 'C']
+    assert results == {c: [f'/{c}/{i}' for i in range(3)] for c in ['A', 'B', 'C']}
+
+
+def test_run_pipeline_http_error(server, tmp_path):
+    # A fails in the download stage, B still finishes
+    jobs = [
+        CountryJob('A', lambda: [(f'{server}/fail', 'A.png')], read_all, str(tmp_path)),
+        CountryJob('B', lambda: [(f'{server}/B', 'B.png')], read_all, str(tmp_path)),
+    ]
+    results = asyncio.run(run_pipeline(jobs))
+    assert isinstance(results['A'], aiohttp.ClientResponseError)
+    assert results['B'] == ['/B']
+
+
+def test_run_pipeline_compute_error(server, tmp_path):
+    def broken():
+        raise RuntimeError('EE down')
+
+    jobs = [
+        CountryJob('A', broken, read_all, str(tmp_path)),
+        CountryJob('B', lambda: [(f'{server}/B', 'B.png')], read_all, str(tmp_path)),
+    ]
+    results = asyncio.run(run_pipeline(jobs))
+    assert isinstance(results['A'], RuntimeError)
+    assert str(results['A']) == 'EE down'
+    assert results['B'] == ['/B']
+
+
+def test_run_pipeline_render_error(server, tmp_path):
+    jobs = [
+        # the render call itself fails in the process pool
+        CountryJob('A', lambda: [(f'{server}/A', 'A.png')], partial(read_all, extra=True), str(tmp_path)),
+        CountryJob('B', lambda: [(f'{server}/B', 'B.png')], read_all, str(tmp_path)),
+    ]
+    results = asyncio.run(run_pipeline(jobs))
+    assert isinstance(results['A'], TypeError)
+    assert results['B'] == ['/B']
+
+
+def test_backpressure(server, tmp_path, monkeypatch):
+    # with queue_size=1 the compute stage can't run ahead of a stalled render stage
+    started = []
+    gate = asyncio.Event()
+
+    async def stalled_render_stage(in_queue, process_pool, results):
+        await gate.wait()
+        while (item := await in_queue.get()) is not None:
+            results[item[0].country] = item[1]
+
+    monkeypatch.setattr(orchestrator, 'render_stage', stalled_render_stage)
+    jobs = [
+        CountryJob(c, partial(fake_compute, server, c, started), read_all, str(tmp_path / c))
+        for c in 'ABCDEF'
+    ]
+
+    async def main():
+        pipeline = asyncio.create_task(run_pipeline(jobs, queue_size=1))
+        await asyncio.sleep(0.5)
+        # one job in each queue, one in download, one waiting on put()
+        in_flight = len(started)
+        gate.set()
+        await pipeline
+        return in_flight
+
+    assert asyncio.run(main()) <= 4
+    assert started == list('ABCDEF')
@@ -0,0 +1,138 @@
+import io
+import json
+import os
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import numpy as np
+import pytest
+
+import raster_store
+from raster_store import NODATA, RasterStore
+from utils import METERS_PER_DEGREE
+
+# Synthetisches Raster: Wert = Zeile * 1000 + Spalte im Gesamtraster,
+# getDownloadURL / requests.get werden durch einen lokalen Stub ersetzt.
+
+BBOX = (10.0, 50.0, 10.0 + 700 * 0.01, 50.0 + 600 * 0.01)
+RES = 0.01
+WIDTH, HEIGHT = 700, 600
+TILE = 256
+
+
+def expected_array():
+    rows, cols = np.mgrid[0:HEIGHT, 0:WIDTH]
+    data = (rows * 1000 + cols).astype('float32')
+    data[:10, :10] = NODATA
+    return data
+
+
+class FakeImage:
+    def __init__(self):
+        self.calls = []
+
+    def getDownloadURL(self, params):
+        self.calls.append(params)
+        return 'http://stub/download?' + urlencode({'params': json.dumps(params)})
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+def fake_get(url, timeout=None):
+    params = json.loads(parse_qs(urlparse(url).query)['params'][0])
+    width, height = (int(v) for v in params['dimensions'].split('x'))
+    x0, y0 = params['crs_transform'][2], params['crs_transform'][5]
+    col_off = round((x0 - BBOX[0]) / RES)
+    row_off = round((BBOX[3] - y0) / RES)
+
+    tile = expected_array()[row_off:row_off + height, col_off:col_off + width]
+    # NPY downloads are structured arrays with one field per band
+    data = np.zeros(tile.shape, dtype=[(params['bands'][0], 'float32')])
+    data[params['bands'][0]] = tile
+    buf = io.BytesIO()
+    np.save(buf, data)
+    return FakeResponse(buf.getvalue())
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(raster_store.requests, 'get', fake_get)
+    with RasterStore(str(tmp_path)) as store:
+        yield store
+
+
+@pytest.fixture
+def entry(store):
+    image = FakeImage()
+    # scale in meters so that the pixel size in EPSG:4326 is exactly RES
+    entry = store.download('projects/p/assets/NDVI/MODIS_NDVI_Sep_2018_Forest_Agri', 'NDVI_2018', BBOX,
+                           scale=RES * METERS_PER_DEGREE, year=2018, image=image,
+                           tile_size=TILE)
+    assert len(image.calls) == 3 * 3
+    return entry
+
+
+def test_download_writes_cog_and_catalog(store, entry):
+    assert entry == store.entry(entry['asset_id'], entry['band'])
+    assert store.entries(year=2018) == [entry]
+    assert store.entries(year=2019) == []
+    assert entry['minx'] == pytest.approx(BBOX[0])
+    assert entry['maxy'] == pytest.approx(BBOX[3])
+    assert store.verify(entry['asset_id'], entry['band'])
+
+    import rasterio
+    with rasterio.open(entry['path']) as src:
+        assert (src.width, src.height) == (WIDTH, HEIGHT)
+        assert src.block_shapes[0] == (TILE, TILE)
+        assert src.overviews(1) == [2]
+
+
+def test_read_full_and_windowed(store, entry):
+    expected = np.ma.masked_equal(expected_array(), NODATA)
+
+    full = store.read(entry['asset_id'], entry['band'])
+    np.testing.assert_array_equal(full.mask, expected.mask)
+    np.testing.assert_array_equal(full.filled(0), expected.filled(0))
+
+    window = store.read(entry['asset_id'], entry['band'], bbox=(10.5, 51.0, 11.0, 51.5))
+    row0, col0 = round((BBOX[3] - 51.5) / RES), round((10.5 - BBOX[0]) / RES)
+    np.testing.assert_array_equal(window, expected_array()[row0:row0 + 50, col0:col0 + 50])
+
+    thumb = store.read(entry['asset_id'], entry['band'], out_shape=(HEIGHT // 2, WIDTH // 2))
+    assert thumb.shape == (HEIGHT // 2, WIDTH // 2)
+
+
+def test_memmap(store, entry):
+    data = store.memmap(entry['asset_id'], entry['band'])
+    assert isinstance(data, np.memmap)
+    expected = expected_array()
+    assert np.isnan(data[:10, :10]).all()
+    np.testing.assert_array_equal(data[10:, 10:], expected[10:, 10:])
+    # the uncompressed cache is written once and reused
+    cache = entry['path'] + '.npy'
+    mtime = os.path.getmtime(cache)
+    assert store.memmap(entry['asset_id'], entry['band']).shape == data.shape
+    assert os.path.getmtime(cache) == mtime
+
+
+def test_missing_entry(store):
+    with pytest.raises(KeyError):
+        store.entry('projects/p/assets/missing', 'NDVI')
+
+
+def test_failed_download_removes_tmp(tmp_path, monkeypatch):
+    def broken_get(url, timeout=None):
+        raise ConnectionError('stub down')
+
+    monkeypatch.setattr(raster_store.requests, 'get', broken_get)
+    with RasterStore(str(tmp_path)) as store:
+        with pytest.raises(ConnectionError):
+            store.download('projects/p/assets/NDVI/broken', 'NDVI', BBOX,
+                           scale=RES * METERS_PER_DEGREE, image=FakeImage(), tile_size=TILE)
+        assert not [f for f in os.listdir(tmp_path) if f.endswith('.tif')]
+        assert store.entries() == []
@@ -8,6 +8,7 @@ from reportlab.lib.pagesizes import A4, portrait
 from reportlab.lib.units import cm
 import glob
 import os
+from colormap import build_lut, draw_legend
 
 # Scaling Factor and Offset from Google Engine Docs
 SCALE = 0.00341802
@@ -21,6 +22,36 @@ T_MAX_K = 330
 dn_min = (T_MIN_K - OFFSET) / SCALE
 dn_max = (T_MAX_K - OFFSET) / SCALE
 
+# Simplify tolerance as a fraction of the output scale (in meters)
+SIMPLIFY_FACTOR = 0.5
+
+# meters → degrees (EPSG:4326 at the equator)
+METERS_PER_DEGREE = 111320
+
+# Tolerance for bounding boxes that are only used in filterBounds
+BOUNDS_MAX_ERROR = 1000
+
+# Sentinel-2 scene filter and SCL classes treated as cloud (shadow, medium, high, cirrus)
+S2_MAX_CLOUD = 30
+S2_SCL_CLOUD_CLASSES = (3, 8, 9, 10)
+
+# QA60 cloud bits are not populated from processing baseline 04.00 (2022-01-25) on
+S2_QA60_END = '2022-01-25'
+
+# Annual NDVI assets written by processMODIS_NDVI (change images in the same folder don't match)
+MODIS_NDVI_YEAR_PATTERN = r'_Sep_(\d{4})_Forest_Agri$'
+
+# Provenance codes of the composite 'source' band. There is no code for the mean
+# fallback: median and mean of a collection are masked on the same pixels, so it
+# never fills anything (2 is left unused).
+SOURCE_NONE = 0
+SOURCE_MEDIAN = 1
+SOURCE_MODIS = 3
+SOURCE_NAMES = {SOURCE_NONE: 'none', SOURCE_MEDIAN: 'landsat_median', SOURCE_MODIS: 'modis'}
+
+# Observation counts are kept per sensor: Landsat scenes vs. MODIS days are not comparable
+OBS_COUNT_BANDS = ['obs_count_landsat', 'obs_count_modis']
+
 # Create different Masks for Forest
 
 def get_country_geometry(name: str) -> ee.Geometry:
@@ -35,6 +66,37 @@ def get_country_geometry(name: str) -> ee.Geometry:
         raise ValueError(f"Land '{name}' nicht gefunden in GeoBoundaries.")
     return country_feature.geometry()
 
+def prepare_geometry(region: ee.Geometry, scale: float) -> dict:
+    """
+    Bereitet eine Ländergeometrie für Filter und Clip vor.
+
+    Args:
+        region (ee.Geometry): volle Geometrie, e.g. aus get_country_geometry
+        scale (float): Ausgabe-Auflösung in Metern, bestimmt die Toleranz
+
+    Returns:
+        dict: 'exact' (Originalgeometrie), 'clip' (vereinfachtes Polygon)
+              und 'bounds' (Bounding Box für filterBounds)
+    """
+    # Vertices closer than half an output pixel don't change the result
+    tolerance = scale * SIMPLIFY_FACTOR
+    return {
+        'exact': region,
+        'clip': region.simplify(maxError=tolerance),
+        'bounds': region.bounds(maxError=tolerance),
+    }
+
+def clip_to_region(image: ee.Image, geoms: dict, exact: bool = False) -> ee.Image:
+    """
+    Clippt mit dem vereinfachten Polygon, bei exact=True mit der Originalgeometrie.
+
+    Args:
+        image (ee.Image): fertig reduziertes Bild
+        geoms (dict): Ergebnis von prepare_geometry
+        exact (bool, optional): exakte Grenzen für die finale Maske. Defaults to False.
+    """
+    return image.clip(geoms['exact'] if exact else geoms['clip'])
+
 def dn_to_kelvin(dn_image: ee.Image) -> ee.Image:
     """Konvertiert das DN-Band in Kelvin."""
     return dn_image.multiply(SCALE).add(OFFSET)
@@ -80,7 +142,10 @@ def mask_lst_range(image: ee.Image) -> ee.Image:
 # 5. MULTI-TEMPORAL COMPOSITING mit verschiedenen Strategien
 def create_gap_filled_composite(collection):
     """
-    Erstellt ein lückengefülltes Komposit mit mehreren Strategien
+    Erstellt ein lückengefülltes Komposit mit mehreren Strategien.
+    Bänder: LST_Celsius, source (Provenienz-Code pro Pixel) und obs_count_landsat (Anzahl Szenen).
+    Der Mean-Fallback füllt keine Pixel: Median und Mean haben dieselbe Maske
+    (mindestens eine Szene), source ist daher nur SOURCE_MEDIAN oder SOURCE_NONE.
     """
     # Bilder verarbeiten
     processed = collection.map(mask_lst_range)
@@ -96,7 +161,13 @@ def create_gap_filled_composite(collection):
     # Verwende den Median wo verfügbar, sonst den Mean
     final_composite = median_composite.unmask(mean_composite)
     
-    return final_composite
+    # Provenienz: Median, sonst keine Daten
+    source = ee.Image(SOURCE_NONE) \
+        .where(median_composite.mask().gt(0), SOURCE_MEDIAN) \
+        .rename('source').toByte()
+    obs_count = lst_collection.count().unmask(0).rename('obs_count_landsat').toInt16()
+    
+    return final_composite.addBands([source, obs_count])
 
 def process_modis(image):
     def has_qc_day_fn(img):
@@ -122,18 +193,21 @@ def process_modis(image):
 # 6. ZUSÄTZLICHE DATENQUELLEN für Gap-Filling
 def add_modis_data_for_gaps(landsat_composite, country_geom):
     """
-    Fügt MODIS LST Daten hinzu um Lücken zu füllen
+    Fügt MODIS LST Daten hinzu um Lücken zu füllen.
+    source wird für die MODIS-Pixel fortgeschrieben, dazu kommt obs_count_modis (Anzahl Tage).
     """
     # MODIS Terra LST (niedrigere Auflösung aber bessere zeitliche Abdeckung)
     modis_collection = (
         ee.ImageCollection("MODIS/061/MOD11A1")
         .filterDate("2023-06-01", "2023-09-01")
-        .filterBounds(country_geom)
+        .filterBounds(country_geom.bounds(maxError=BOUNDS_MAX_ERROR))
         .select("LST_Day_1km")
     )
     
     modis_processed = modis_collection.map(process_modis)
     modis_median = modis_processed.median()
+    # no reproject: EE resamples the band on demand at the requested output scale
+    modis_count = modis_processed.count().unmask(0).rename('obs_count_modis').toInt16()
     
     # MODIS auf Landsat-Auflösung resamplen
     modis_resampled = modis_median.resample('bilinear').reproject(
@@ -142,9 +216,63 @@ def add_modis_data_for_gaps(landsat_composite, country_geom):
     )
     
     # Landsat wo verfügbar, sonst MODIS
-    gap_filled = landsat_composite.unmask(modis_resampled)
+    landsat_lst = landsat_composite.select('LST_Celsius')
+    gap_filled = landsat_lst.unmask(modis_resampled)
+    
+    from_modis = landsat_lst.mask().gt(0).Not().And(modis_resampled.mask().gt(0))
+    source = landsat_composite.select('source').where(from_modis, SOURCE_MODIS)
     
-    return gap_filled
+    return gap_filled.addBands([source, landsat_composite.select('obs_count_landsat'), modis_count])
+
+def summarize_composite_quality(image, geometry, scale=1000, count_bands=OBS_COUNT_BANDS):
+    """
+    Coverage-Statistik eines Komposits aus einer einzigen Reduktion
+    (Pixelanzahl und mittlere Beobachtungen, gruppiert nach source).
+
+    Args:
+        image (ee.Image): Ergebnis von create_gap_filled_composite / add_modis_data_for_gaps
+        geometry (ee.Geometry): Region der Statistik
+        scale (int, optional): gröbere Auflösung für die Statistik. Defaults to 1000.
+        count_bands (list, optional): obs_count-Bänder des Bildes, für ein reines Landsat-Komposit
+            ['obs_count_landsat']. Defaults to OBS_COUNT_BANDS.
+
+    Returns:
+        dict: total_pixels, valid_pixels, source_fraction {Name: Anteil},
+              mean_obs_count {Name: {obs_count_*: Mittelwert}} pro Quelle
+    """
+    count_bands = list(count_bands)
+    
+    # count and means per band, grouped by the source band (last input)
+    reducer = ee.Reducer.count().repeat(len(count_bands)) \
+        .combine(ee.Reducer.mean().repeat(len(count_bands)), sharedInputs=True) \
+        .group(groupField=len(count_bands), groupName='source')
+    
+    stats = image.select(count_bands + ['source']).reduceRegion(
+        reducer=reducer,
+        geometry=geometry,
+        scale=scale,
+        maxPixels=1e10
+    ).getInfo()
+    
+    # an empty region gives no groups
+    groups = {int(g['source']): g for g in (stats.get('groups') or [])}
+    pixels = {code: g['count'][0] for code, g in groups.items()}
+    
+    total = sum(pixels.values())
+    valid = total - pixels.get(SOURCE_NONE, 0)
+    
+    return {
+        'total_pixels': total,
+        'valid_pixels': valid,
+        'source_fraction': {
+            name: pixels.get(code, 0) / total if total else 0.0
+            for code, name in SOURCE_NAMES.items()
+        },
+        'mean_obs_count': {
+            SOURCE_NAMES[code]: dict(zip(count_bands, g['mean']))
+            for code, g in groups.items() if code != SOURCE_NONE
+        },
+    }
 
 def visual_map(final_result, country_geom):
     # Map visualisieren
@@ -174,6 +302,7 @@ def export_to_drive(final_result, country_geom):
     )
 
     export_task.start()
+    return export_task
     
 def collections(dataset, country_geom, start, end, cloud='CLOUD_COVER'):
     """_summary_
@@ -191,7 +320,7 @@ def collections(dataset, country_geom, start, end, cloud='CLOUD_COVER'):
     return (
     ee.ImageCollection(dataset)
     .filterDate(start, end)
-    .filterBounds(country_geom)
+    .filterBounds(country_geom.bounds(maxError=BOUNDS_MAX_ERROR))
     .filter(ee.Filter.lt(cloud, 50))
 )
     
@@ -234,9 +363,10 @@ def combine_mask_OR(*mask):
         mask = mask.And(layer)
     return mask
         
-def processMODIS_NDVI(year, region, masks, out_folder):
+def processMODIS_NDVI(year, region, masks, out_folder, exact=False):
     start = ee.Date.fromYMD(year, 9, 1)
     end = ee.Date.fromYMD(year, 9, 30)
+    geoms = prepare_geometry(region, 250)
     
     modisNDVI = ee.ImageCollection("MODIS/061/MOD13Q1") \
         .filterDate(start, end) \
@@ -245,7 +375,7 @@ def processMODIS_NDVI(year, region, masks, out_folder):
             .multiply(0.0001)
             .copyProperties(img, ['system:time_start']))
         
-    medianNDVI = modisNDVI.median().clip(region)
+    medianNDVI = clip_to_region(modisNDVI.median(), geoms, exact)
     
     maskedNDVI = medianNDVI.updateMask(masks).rename('NDVI_' + str(year))
     
@@ -259,6 +389,7 @@ def processMODIS_NDVI(year, region, masks, out_folder):
         maxPixels=1e13
         )
     task.start()
+    return task
     
 def getIMG(name, type):
     """_summary_
@@ -272,16 +403,19 @@ def getIMG(name, type):
     """
     return ee.Image(name).select(type)
 
-def get_masked_MODIS_NDVI(year, region, masks, image_collection):
+def get_masked_MODIS_NDVI(year, region, masks, image_collection, scale=250, exact=False):
     start = ee.Date.fromYMD(year, 9, 1)
     end = ee.Date.fromYMD(year, 9, 30)
+    geoms = prepare_geometry(region, scale)
     
-    return ee.ImageCollection(image_collection) \
+    medianNDVI = ee.ImageCollection(image_collection) \
         .filterDate(start, end) \
         .select('NDVI') \
         .map(lambda img: img 
             .multiply(0.0001)
-            .copyProperties(img, ['system:time_start'])).median().clip(region).updateMask(masks)
+            .copyProperties(img, ['system:time_start'])).median()
+    
+    return clip_to_region(medianNDVI, geoms, exact).updateMask(masks)
 
 def export_masked_MODIS_NDVI(ndviChange,out_folder, region, start, end):
     task = ee.batch.Export.image.toAsset(
@@ -294,6 +428,7 @@ def export_masked_MODIS_NDVI(ndviChange,out_folder, region, start, end):
         maxPixels=1e13
         )
     task.start()
+    return task
     
     
 def export_masked_COPERNICUS_NDVI(ndviChange, out_folder, region, start, end):
@@ -307,6 +442,7 @@ def export_masked_COPERNICUS_NDVI(ndviChange, out_folder, region, start, end):
         maxPixels=1e13
         )
     task.start()
+    return task
     
 def get_masked_COPERNICUS(year, region, masks, image_collection):
     start = ee.Date.fromYMD(year, 9, 1)
@@ -318,7 +454,7 @@ def get_masked_COPERNICUS(year, region, masks, image_collection):
         .updateMask(masks)
         
 
-def get_masked_NDVI(collection_id, region, mask, year, bands=None):
+def get_masked_NDVI(collection_id, region, mask, year, bands=None, scale=200, exact=False):
     """_summary_
 
     Args:
@@ -327,19 +463,22 @@ def get_masked_NDVI(collection_id, region, mask, year, bands=None):
         mask (img Mask): combine masks befor
         year (int): year you wanna exploit
         bands (String or list of Strings, optional): select the bands you wanna use. Defaults to None.
+        scale (int, optional): output scale in meters, sets the simplify tolerance. Defaults to 200.
+        exact (bool, optional): clip with the full-resolution border. Defaults to False.
 
     Returns:
         _type_: _description_
     """
     start = ee.Date.fromYMD(year, 1, 1)
     end = ee.Date.fromYMD(year, 12, 30)
+    geoms = prepare_geometry(region, scale)
     col = ee.ImageCollection(collection_id) \
             .filterDate(start, end) \
-            .filterBounds(region)
+            .filterBounds(geoms['bounds'])
 
     if bands:  # Sentinel-2
         # 1) nur B4/B8 auswählen, 2) skalieren, 3) NDVI berechnen
-        img = col.median().select(bands).multiply(0.0001)
+        img = col.select(bands).median().multiply(0.0001)
         ndvi = img.normalizedDifference(bands).rename('NDVI')
     else:      # MODIS
         # 1) MODIS liefert schon ein NDVI-Band, 2) skalieren
@@ -349,7 +488,86 @@ def get_masked_NDVI(collection_id, region, mask, year, bands=None):
                 .median()
 
     # 3) clip & mask anwenden
-    return ndvi.clip(region).updateMask(mask)
+    return clip_to_region(ndvi, geoms, exact).updateMask(mask)
+
+def mask_s2_clouds_scl(image: ee.Image) -> ee.Image:
+    """
+    Maskiert Wolken pro Szene über die Scene Classification (Level-2A).
+    """
+    # SCL: 3 = cloud shadow, 8/9 = cloud medium/high probability, 10 = cirrus
+    scl = image.select('SCL')
+    return image.updateMask(select_mask_OR(scl, *S2_SCL_CLOUD_CLASSES).Not())
+
+def mask_s2_clouds_qa60(image: ee.Image) -> ee.Image:
+    """
+    Maskiert Wolken pro Szene über QA60 (Level-1C), nur bis S2_QA60_END gefüllt.
+    """
+    # QA60: Bit 10 = opaque clouds, Bit 11 = cirrus
+    qa = image.select('QA60')
+    return image.updateMask(qa.bitwiseAnd(1 << 10).eq(0).And(qa.bitwiseAnd(1 << 11).eq(0)))
+
+def s2_ndvi(image: ee.Image) -> ee.Image:
+    """Berechnet NDVI (B8/B4) einer einzelnen, wolkenmaskierten Szene."""
+    return image.normalizedDifference(['B8', 'B4']) \
+        .rename('NDVI') \
+        .copyProperties(image, ['system:time_start'])
+
+def get_masked_S2_NDVI(region, mask, year, season=((6, 1), (9, 30)),
+                       collection_id="COPERNICUS/S2_SR_HARMONIZED",
+                       max_cloud=S2_MAX_CLOUD, composite='median',
+                       scale=200, exact=False):
+    """
+    Sentinel-2 NDVI mit Wolkenmaskierung pro Szene statt Jahres-Median über Rohdaten.
+
+    Args:
+        region (ee.Geometry): use get_country_geometry
+        mask (img Mask): combine masks befor
+        year (int): year you wanna exploit
+        season (tuple, optional): ((Monat, Tag), (Monat, Tag)) Zeitfenster. Defaults to Juni–September.
+        collection_id (String, optional): S2 Level-2A (SCL) or Level-1C (QA60, only before S2_QA60_END). Defaults to "COPERNICUS/S2_SR_HARMONIZED".
+        max_cloud (int, optional): max. CLOUDY_PIXEL_PERCENTAGE per scene. Defaults to S2_MAX_CLOUD.
+        composite (String, optional): 'median' or 'quality' (greenest pixel). Defaults to 'median'.
+        scale (int, optional): output scale in meters, sets the simplify tolerance. Defaults to 200.
+        exact (bool, optional): clip with the full-resolution border. Defaults to False.
+
+    Returns:
+        ee.Image: NDVI band
+    """
+    (start_month, start_day), (end_month, end_day) = season
+
+    # SCL only exists in the Level-2A collections
+    if '_SR' in collection_id:
+        qa_bands, mask_clouds = ['SCL'], mask_s2_clouds_scl
+    else:
+        # without a populated QA60 the scenes would go into the composite unmasked
+        if datetime.date(year, end_month, end_day) > datetime.date.fromisoformat(S2_QA60_END):
+            raise ValueError(
+                f"QA60 ist ab {S2_QA60_END} nicht gefüllt, für {year} eine Level-2A Collection (SCL) verwenden."
+            )
+        qa_bands, mask_clouds = ['QA60'], mask_s2_clouds_qa60
+
+    start = ee.Date.fromYMD(year, start_month, start_day)
+    end = ee.Date.fromYMD(year, end_month, end_day)
+    geoms = prepare_geometry(region, scale)
+
+    # 1) Szenen vorfiltern, 2) nur benötigte Bänder, 3) Wolken pro Szene maskieren
+    ndvi_collection = ee.ImageCollection(collection_id) \
+        .filterDate(start, end) \
+        .filterBounds(geoms['bounds']) \
+        .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', max_cloud)) \
+        .select(['B4', 'B8'] + qa_bands) \
+        .map(mask_clouds) \
+        .map(s2_ndvi)
+
+    # 4) erst danach reduzieren
+    if composite == 'quality':
+        ndvi = ndvi_collection.qualityMosaic('NDVI')
+    elif composite == 'median':
+        ndvi = ndvi_collection.median()
+    else:
+        raise ValueError(f"Unbekannter Komposit-Typ '{composite}'.")
+
+    return clip_to_region(ndvi, geoms, exact).updateMask(mask)
 
 def export_masked_NDVI(suffix, prefix, ndviChange, out_folder, region, start, end):
     task = ee.batch.Export.image.toAsset(
@@ -362,6 +580,7 @@ def export_masked_NDVI(suffix, prefix, ndviChange, out_folder, region, start, en
         maxPixels=1e13
         )
     task.start()
+    return task
     
 def filter_bounds_geojson(country):
     """_summary_
@@ -389,14 +608,21 @@ def img_collection(folder_path):
     
     return [ee.Image(id) for id in ids]
 
-def images_to_pdf(image_folder: str, output_pdf: str, descriptions: dict, common_prefix: str):
+def images_to_pdf(image_folder: str, output_pdf: str, descriptions: dict, common_prefix: str,
+                  vis_params: dict = None):
     """
     Erzeugt ein mehrseitiges PDF (DIN A4 Hochformat) mit:
         - je einer PNG pro Seite (proportional skaliert, weißer Hintergrund)
         - individueller Beschreibung oberhalb des Bildes
         - Legende unterhalb des Bildes
     `descriptions` ist ein Dict: {basename_ohne_ext: Beschreibungstext}.
+    `vis_params` ({'min', 'max', 'palette'}) sollten dieselben wie für die Bilder sein,
+    die Legende nutzt dieselbe LUT wie colormap.render_png.
     """
+    if vis_params is None:
+        vis_params = {'min': 0.0, 'max': 1.0, 'palette': ['white', 'yellow', 'green']}
+    lut = build_lut(vis_params['palette'])
+
     # Canvas anlegen
     c = canvas.Canvas(output_pdf, pagesize=portrait(A4))
     page_w, page_h = portrait(A4)
@@ -439,44 +665,12 @@ def images_to_pdf(image_folder: str, output_pdf: str, descriptions: dict, common
             mask='auto'
         )
         
-                # Parameter für Legende
+        # Legende aus derselben LUT wie die Karte
         bar_thickness  = 0.5 * cm
         legend_length = usable_h * 0.5
-        steps = 200
-        min_val, max_val = 0.0, 1.0
         text_offset = 0.2 * cm
-        
-        # Grafikzustand sichern und transformieren
-        c.saveState()
-        tx = page_w - margin - bar_thickness
-        ty = margin
-        c.translate(tx, ty)
-        c.rotate(90)
-        
-        # Zustand wiederherstellen
-        c.restoreState()
-        
-        # Farbverlauf zeichnen (Weiß→Gelb→Grün)
-        for i in range(steps):
-            frac = i / (steps - 1)
-            if frac < 0.5:
-                r, g = 1, 1
-                b    = 1 - 2*frac
-            else:
-                r    = 2*(1-frac)
-                g, b = 1, 0
-            x = 0
-            y = frac * legend_length
-            w = bar_thickness
-            h = legend_length / steps
-            c.setFillColorRGB(r, g, b)
-            c.rect(x, y, w, h, fill=1, stroke=0)
-
-        # Min/Max-Beschriftung
-        c.setFont("Helvetica", 9)
-        c.setFillColorRGB(0,0,0)
-        c.drawString(bar_thickness + text_offset, 0, f"{min_val:.2f}")
-        c.drawString(bar_thickness + text_offset, legend_length - 9, f"{max_val:.2f}")
+        draw_legend(c, lut, 0, 0, bar_thickness, legend_length,
+                    vis_params['min'], vis_params['max'], text_offset)
         
         c.showPage()
     